@@ -1,109 +1,413 @@
 import streamlit as st
 from pathlib import Path
-import pandas as pd
 from datetime import datetime
+import functools
+import hashlib
 import json
+import mmap
 import os
+import pickle
+import re
+import time
+from collections import deque
+
+try:
+    import python_calamine # noqa: F401
+    EXCEL_ENGINE = "calamine" # Much faster than openpyxl for reading .xlsx files
+except ImportError:
+    EXCEL_ENGINE = "openpyxl"
+
+try:
+    import orjson
+    json_loads = orjson.loads # Several times faster than json.loads, and parses bytes directly
+except ImportError:
+    json_loads = json.loads
 
 # --- Configuration ---
 DATA_DIR = Path("data")
 USERS_FILE = Path("users.xlsx")
+USERS_JSON_FILE = Path("users.json")
+USERS_SOURCE_FILE = Path("users.source.json") # (mtime_ns, size) of the users.xlsx that users.json was built from
 USER_REPORT_MAPPING_FILE = Path("user_report_mapping.json")
+DEFAULT_REPORT_FILE = Path("rating_reports.jsonl")
 LOGS_DIR = Path("logs")
+CACHE_DIR = DATA_DIR / ".cache"
 st.set_page_config(layout="wide", page_title="MetaRate")
 
+def migrate_users_xlsx_to_json():
+    """
+    Converts the users Excel file to a username-keyed JSON file.
+    Runs again whenever the Excel file's mtime or size differs from the version
+    last converted, including older copies, so the Excel file stays the place
+    where users are edited.
+    """
+    if not USERS_FILE.exists():
+        return
+    stat = USERS_FILE.stat()
+    source_version = [stat.st_mtime_ns, stat.st_size]
+    if USERS_JSON_FILE.exists() and USERS_SOURCE_FILE.exists():
+        try:
+            with open(USERS_SOURCE_FILE, 'r', encoding="utf-8") as f:
+                if json.load(f) == source_version:
+                    return
+        except ValueError:
+            pass # Reconvert if the marker is unreadable
+    import pandas as pd # Only needed to read Excel files, so kept off the hot path
+    users_df = pd.read_excel(USERS_FILE, engine=EXCEL_ENGINE)
+    if 'is_admin' not in users_df.columns:
+        users_df['is_admin'] = False
+        users_df.loc[0, 'is_admin'] = True
+    users = {}
+    for record in users_df.to_dict("records"):
+        username = str(record.pop('username'))
+        record['password'] = str(record.get('password', ""))
+        record['is_admin'] = bool(record.get('is_admin', False))
+        users[username] = record
+    tmp_file = USERS_JSON_FILE.with_suffix(".tmp")
+    with open(tmp_file, 'w', encoding="utf-8") as f:
+        json.dump(users, f, ensure_ascii=False, indent=2, default=str)
+    os.replace(tmp_file, USERS_JSON_FILE)
+    with open(USERS_SOURCE_FILE, 'w', encoding="utf-8") as f:
+        json.dump(source_version, f)
+
 def initialize_admin_user():
     """
-    Checks if the 'is_admin' column exists in the users file.
-    If not, it adds the column and sets the first user as an admin.
+    Makes sure the users JSON file is up to date with the users Excel file.
+    If the Excel file has no 'is_admin' column, the first user is made an admin.
     """
-    if USERS_FILE.exists():
-        users_df = pd.read_excel(USERS_FILE)
-        if 'is_admin' not in users_df.columns:
-            users_df['is_admin'] = False
-            users_df.loc[0, 'is_admin'] = True
-            users_df.to_excel(USERS_FILE, index=False)
+    migrate_users_xlsx_to_json()
 
 # --- Logging Function ---
-def log_action(username, action, report_id="", rating="", comments=""):
-    """Appends a log entry to the specified Excel file."""
+LOG_COLUMNS = ['Timestamp', 'Username', 'Action', 'Report ID', 'Rating', 'Comments']
+
+def get_log_file(username):
+    """Gets the JSONL action log file for a given user."""
+    return LOGS_DIR / f"{username}_action_log.jsonl"
+
+def get_rated_file(username):
+    """Gets the file listing the report ids a given user has rated, one JSON value per line."""
+    return LOGS_DIR / f"{username}_rated.txt"
+
+def _ensure_rated_file(username):
+    """Builds the user's rated file from their action log if it does not exist yet."""
+    rated_file = get_rated_file(username)
+    if rated_file.exists():
+        return rated_file
+    rated_ids = dict.fromkeys( # Deduplicates while keeping the order of first rating
+        entry.get('Report ID') for entry in read_log_entries(get_log_file(username))
+        if entry.get('Action') == 'Submit Rating'
+    )
     LOGS_DIR.mkdir(exist_ok=True)
-    log_file = LOGS_DIR / f"{username}_action_log.xlsx"
+    tmp_file = rated_file.with_suffix(".tmp")
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        f.write("".join(json.dumps(rid, ensure_ascii=False) + "\n" for rid in rated_ids))
+    os.replace(tmp_file, rated_file)
+    return rated_file
+
+LOG_FLUSH_SIZE = 25 # Buffered entries that trigger a flush
+LOG_FLUSH_INTERVAL = 5 # Seconds after which the next action triggers a flush
+CRITICAL_ACTIONS = {"Login Success", "Login Fail", "Submit Rating", "Logout"}
+
+def log_action(username, action, report_id="", rating="", comments=""):
+    """
+    Buffers a log entry in the session and flushes the buffer to the JSONL log files
+    when it is full, stale, or the action must never be lost (see CRITICAL_ACTIONS).
+    Returns False if a flush this entry needed failed.
+    """
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    columns=['Timestamp', 'Username', 'Action', 'Report ID', 'Rating', 'Comments']
-    new_log_entry = pd.DataFrame([[timestamp, username, action, report_id, rating, comments]], columns=columns)
-    
-    try:
-        if log_file.exists():
-            log_df = pd.read_excel(log_file)
-            if list(log_df.columns) != columns:
-                log_df = new_log_entry
-            else:
-                log_df = pd.concat([log_df, new_log_entry], ignore_index=True)
-        else:
-            log_df = new_log_entry
-        
-        log_df.to_excel(log_file, index=False)
+    entry = dict(zip(LOG_COLUMNS, [timestamp, username, action, report_id, rating, comments]))
+    log_buffer = st.session_state.setdefault("log_buffer", [])
+    log_buffer.append(entry)
+
+    last_flush = st.session_state.setdefault("last_log_flush", time.time())
+    if (action in CRITICAL_ACTIONS or len(log_buffer) >= LOG_FLUSH_SIZE
+            or time.time() - last_flush > LOG_FLUSH_INTERVAL):
+        if not flush_logs():
+            if action == "Submit Rating":
+                # The user is asked to submit again, so a later flush must not save it on its own
+                st.session_state.log_buffer = [e for e in st.session_state.log_buffer if e is not entry]
+            return False
+    return True
+
+def _append_lines(file_path, lines):
+    """
+    Appends lines to a file in one write, first ending a torn last line
+    left by an interrupted write so it cannot swallow the new first line.
+    """
+    with open(file_path, "ab", buffering=8192) as f:
+        if f.tell() > 0:
+            with open(file_path, "rb") as existing:
+                existing.seek(-1, os.SEEK_END)
+                if existing.read(1) != b"\n":
+                    f.write(b"\n")
+        f.write("".join(lines).encode("utf-8"))
+
+def flush_logs():
+    """
+    Appends all buffered log entries to their users' JSONL log files.
+    Returns whether every buffered entry was written.
+    """
+    st.session_state.last_log_flush = time.time()
+    log_buffer = st.session_state.get("log_buffer")
+    if not log_buffer:
+        return True
+
+    entries_by_user = {}
+    for entry in log_buffer:
+        entries_by_user.setdefault(entry['Username'], []).append(entry)
 
-    except Exception as e:
-        st.sidebar.error(f"Log Error: {e}")
+    LOGS_DIR.mkdir(exist_ok=True)
+    flushed_users = set()
+    for username, entries in entries_by_user.items():
+        try:
+            rated_ids = [entry['Report ID'] for entry in entries if entry['Action'] == 'Submit Rating']
+            if rated_ids:
+                _ensure_rated_file(username) # Built from the log before these entries are added
+            _append_lines(get_log_file(username), [json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries])
+            flushed_users.add(username) # Never write these entries to the log again
+            if rated_ids:
+                try:
+                    _append_lines(get_rated_file(username), [json.dumps(rid, ensure_ascii=False) + "\n" for rid in rated_ids])
+                except Exception:
+                    # The log now holds these ratings, so let the rated file be rebuilt from it
+                    get_rated_file(username).unlink(missing_ok=True)
+                    raise
+        except Exception as e:
+            st.sidebar.error(f"Log Error: {e}")
+    st.session_state.log_buffer = [entry for entry in log_buffer if entry['Username'] not in flushed_users]
+    return not st.session_state.log_buffer
+
+def read_log_entries(log_file):
+    """Reads all log entries from a JSONL log file, skipping lines that do not decode."""
+    if not log_file.exists():
+        return []
+    entries = []
+    with open(log_file, 'rb') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                entries.append(json_loads(line))
+            except ValueError:
+                continue # Skip torn lines left by interrupted appends
+    return entries
+
+def migrate_legacy_logs():
+    """
+    Converts legacy Excel action logs to JSONL, keeping every column: LOG_COLUMNS
+    first, then any others older logs used (e.g. 'Case', 'Series', 'Details').
+    Logs that already have a JSONL counterpart are left untouched.
+    """
+    if not LOGS_DIR.exists():
+        return
+    for legacy_file in LOGS_DIR.glob("*_action_log.xlsx"):
+        log_file = legacy_file.with_suffix(".jsonl")
+        if log_file.exists():
+            continue
+        try:
+            import pandas as pd
+            log_df = pd.read_excel(legacy_file, engine=EXCEL_ENGINE).fillna("")
+        except Exception:
+            continue
+        lines = []
+        columns = LOG_COLUMNS + [col for col in log_df.columns if col not in LOG_COLUMNS]
+        for entry in log_df.to_dict("records"):
+            for col, value in entry.items():
+                if isinstance(value, float) and value.is_integer():
+                    entry[col] = int(value) # Excel stores whole numbers next to blanks as floats
+            lines.append(json.dumps({col: entry.get(col, "") for col in columns}, ensure_ascii=False, default=str) + "\n")
+        # Write to a temporary file first so an interrupted migration is retried on the next start
+        tmp_file = log_file.with_suffix(".tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            f.write("".join(lines))
+        os.replace(tmp_file, log_file)
 
 # --- Data Loading Functions ---
 
-@st.cache_data
+@st.cache_resource
+def _load_users(mtime_ns):
+    """Loads user data from a given version of the users JSON file."""
+    with open(USERS_JSON_FILE, 'r', encoding="utf-8") as f:
+        return json.load(f)
+
 def load_users():
-    """Loads user data from the excel file."""
-    if not USERS_FILE.exists():
+    """Loads user data as a {username: {"password": ..., "is_admin": ...}} dict."""
+    migrate_users_xlsx_to_json() # Picks up edits to the Excel file without a restart
+    if not USERS_JSON_FILE.exists():
         st.error(f"User file not found at {USERS_FILE}")
         return None
-    return pd.read_excel(USERS_FILE)
+    return _load_users(USERS_JSON_FILE.stat().st_mtime_ns)
 
-def get_report_file_for_user(username):
-    """Gets the report file for a given user from the mapping file."""
-    if not USER_REPORT_MAPPING_FILE.exists():
-        return Path("rating_reports.jsonl") # Fallback to default if no mapping file
+@st.cache_resource(max_entries=4)
+def _user_to_file(mtime_ns):
+    """Inverts a given version of the mapping file into a {username: report_file} dict."""
     with open(USER_REPORT_MAPPING_FILE, 'r') as f:
         mapping = json.load(f)
-    for report_file, users in mapping.items():
-        if username in users:
-            return Path(report_file)
-    return Path("rating_reports.jsonl") # Fallback for users not in mapping
-
-def load_reports(file_path):
-    """Loads reports from a JSONL file."""
-    if not file_path.exists():
-        return []
-    reports = []
-    with open(file_path, 'r') as f:
-        for line in f:
-            reports.append(json.loads(line))
-    return reports
+    return {username: Path(report_file) for report_file, users in mapping.items() for username in users}
 
-@st.cache_data
-def load_all_reports(report_file):
-    """Loads all reports from a given report file."""
-    if report_file is None:
-        return []
-    return load_reports(report_file)
+def _load_mapping():
+    """
+    Gets the inverted user to report file mapping, parsed at most once per
+    version of the mapping file, so edits are picked up without a restart.
+    """
+    try:
+        mtime_ns = os.stat(USER_REPORT_MAPPING_FILE).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    return _user_to_file(mtime_ns)
+
+@functools.lru_cache(maxsize=None)
+def get_report_file_for_user(username):
+    """
+    Gets the report file for a given user from the mapping file.
+    Memoized without Streamlit's hashing; as the script is re-executed on every rerun,
+    this only lasts one run, while the parsed mapping itself lives in st.cache_resource.
+    """
+    mapping = _load_mapping()
+    if mapping is None:
+        return DEFAULT_REPORT_FILE # Fallback to default if no mapping file
+    return mapping.get(username, DEFAULT_REPORT_FILE) # Fallback for users not in mapping
+
+def _iter_mapped_lines(file_path):
+    """Yields (byte_offset, line) for each non-blank line of a memory-mapped file."""
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return # Empty files cannot be mapped
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            while True:
+                offset = mm.tell()
+                line = mm.readline()
+                if not line:
+                    break
+                if line.strip():
+                    yield offset, line
+
+def _build_report_index(report_file):
+    """Scans a JSONL report file once, recording the byte offset of each report."""
+    offsets = {}
+    ids = []
+    for offset, line in _iter_mapped_lines(report_file):
+        rating_id = json_loads(line).get("rating_id")
+        offsets[rating_id] = offset
+        ids.append(rating_id)
+    return {"offsets": offsets, "ids": ids}
+
+@st.cache_resource(show_spinner=False)
+def _load_report_index(report_file, mtime_ns, size):
+    """
+    Loads the offset index of a report file from its on-disk sidecar,
+    building and persisting it first if the file changed since the last build.
+    The sidecar outlives server restarts, so a cold start unpickles the index
+    instead of rescanning the JSONL. Sidecars are keyed on the file's path too.
+    """
+    report_file = Path(report_file)
+    path_hash = hashlib.sha1(str(report_file.resolve()).encode("utf-8")).hexdigest()[:12]
+    index_prefix = f"{report_file.name}.{path_hash}"
+    index_file = CACHE_DIR / f"{index_prefix}.{mtime_ns}.{size}.idx.pkl"
+    if index_file.exists():
+        try:
+            with open(index_file, 'rb') as f:
+                return pickle.load(f)
+        except Exception:
+            pass # Rebuild corrupt or unreadable sidecars
+
+    index = _build_report_index(report_file)
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # Only match this exact file's sidecars, not those of e.g. "reports.jsonl.bak"
+        stale_pattern = re.compile(rf"{re.escape(index_prefix)}\.\d+\.\d+\.idx\.pkl")
+        for stale_file in CACHE_DIR.iterdir():
+            if stale_file != index_file and stale_pattern.fullmatch(stale_file.name):
+                stale_file.unlink(missing_ok=True)
+        tmp_file = index_file.with_suffix(".tmp")
+        with open(tmp_file, 'wb') as f:
+            pickle.dump(index, f, protocol=5)
+        os.replace(tmp_file, index_file)
+    except OSError:
+        pass # The index still works from memory if the cache dir is not writable
+    return index
+
+def load_report_index(report_file):
+    """
+    Gets the {"offsets": {rating_id: byte_offset}, "ids": [rating_id, ...]}
+    index of a report file, in file order.
+    """
+    if report_file is None or not report_file.exists():
+        return {"offsets": {}, "ids": []}
+    stat = report_file.stat()
+    return _load_report_index(str(report_file), stat.st_mtime_ns, stat.st_size)
 
 def get_report_by_id(rating_id, report_file):
     """Gets a report by its rating_id from a given report file."""
-    reports = load_all_reports(report_file)
-    for report in reports:
-        if report.get("rating_id") == rating_id:
-            return report
-    return None
+    offset = load_report_index(report_file)["offsets"].get(rating_id)
+    if offset is None:
+        return None
+    with open(report_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        end = mm.find(b"\n", offset)
+        return json_loads(mm[offset:end if end != -1 else len(mm)])
 
 def get_rated_reports(username):
-    """Gets the set of report numbers that the user has already rated."""
-    log_file = LOGS_DIR / f"{username}_action_log.xlsx"
-    if not log_file.exists():
+    """
+    Gets the set of report numbers that the user has already rated.
+    Reads the user's rated file rather than scanning their whole action log.
+    """
+    if not get_rated_file(username).exists() and not get_log_file(username).exists():
         return set()
     try:
-        log_df = pd.read_excel(log_file)
-        return set(log_df[log_df['Action'] == 'Submit Rating']['Report ID'].unique())
+        lines = _ensure_rated_file(username).read_bytes().splitlines()
     except Exception:
         return set()
+    rated_reports = set()
+    for line in lines:
+        try:
+            rated_reports.add(json_loads(line))
+        except ValueError:
+            continue # Skip blank and torn lines
+    return rated_reports
+
+def _report_file_version(report_file):
+    """Gets the (mtime_ns, size) version of a report file, or None if it is missing."""
+    try:
+        stat = report_file.stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+def init_rating_session(username):
+    """
+    Loads the ordered queue of reports the user has left to rate, and the report total,
+    into the session state, so page changes do not have to rescan the log or report files.
+    """
+    report_file = get_report_file_for_user(username)
+    st.session_state.report_file = report_file
+    st.session_state.report_file_version = _report_file_version(report_file)
+    report_ids = load_report_index(report_file)["ids"]
+    rated_reports = get_rated_reports(username)
+    st.session_state.total_reports = len(report_ids)
+    st.session_state.unrated = deque(rid for rid in report_ids if rid not in rated_reports)
+
+def ensure_rating_session(username):
+    """
+    Reloads the rating session state if it is missing, the user was mapped to another
+    report file, or their report file changed since the state was built.
+    Returns whether the state was reloaded.
+    """
+    report_file = get_report_file_for_user(username)
+    if ('unrated' not in st.session_state
+            or st.session_state.get('report_file') != report_file
+            or st.session_state.get('report_file_version') != _report_file_version(report_file)):
+        init_rating_session(username)
+        return True
+    return False
+
+def reset_session():
+    """Flushes pending logs and clears the per-user session state on logout."""
+    flush_logs()
+    st.session_state.logged_in = False
+    st.session_state.page = "login"
+    for key in ('username', 'is_admin', 'total_reports', 'unrated', 'report_file', 'report_file_version', 'selected_report_id'):
+        if key in st.session_state:
+            del st.session_state[key]
 
 # --- Page Drawing Functions ---
 
@@ -114,8 +418,8 @@ def draw_login_page():
     with col2:
         st.image("logo.png", use_column_width=True)
 
-    users_df = load_users()
-    if users_df is None: return
+    users = load_users()
+    if users is None: return
 
     with st.form("login_form"):
         username = st.text_input("Username")
@@ -123,13 +427,14 @@ def draw_login_page():
         submitted = st.form_submit_button("Login")
 
         if submitted:
-            user_record = users_df[users_df['username'] == username]
-            if not user_record.empty and str(user_record.iloc[0]['password']) == password:
+            user_record = users.get(username)
+            if user_record and str(user_record['password']) == password:
                 st.session_state.logged_in = True
                 st.session_state.username = username
-                st.session_state.is_admin = user_record.iloc[0].get('is_admin', False)
+                st.session_state.is_admin = user_record.get('is_admin', False)
                 st.session_state.page = "progress"
                 log_action(username, "Login Success")
+                init_rating_session(username)
                 st.rerun()
             else:
                 st.error("Invalid username or password")
@@ -142,19 +447,13 @@ def draw_progress_page():
 
     if st.sidebar.button("Logout"):
         log_action(st.session_state.username, "Logout")
-        st.session_state.logged_in = False
-        st.session_state.page = "login"
-        del st.session_state.username
-        if 'is_admin' in st.session_state:
-            del st.session_state.is_admin
+        reset_session()
         st.rerun()
-    
-    report_file = get_report_file_for_user(username)
-    all_reports = load_all_reports(report_file)
-    rated_reports = get_rated_reports(username)
-    
-    total_reports = len(all_reports)
-    rated_count = len(rated_reports)
+
+    ensure_rating_session(username)
+
+    total_reports = st.session_state.total_reports
+    rated_count = total_reports - len(st.session_state.unrated)
     
     progress = rated_count / total_reports if total_reports > 0 else 0
     
@@ -162,17 +461,24 @@ def draw_progress_page():
     st.markdown(f"You have rated **{rated_count}** out of **{total_reports}** reports.")
     
     if st.button("Start Rating" if rated_count == 0 else "Continue Rating"):
-        reports_to_rate = [r for r in all_reports if r.get('rating_id') not in rated_reports]
-        if reports_to_rate:
+        if st.session_state.unrated:
             st.session_state.page = "rating"
-            st.session_state.selected_report_id = reports_to_rate[0]['rating_id']
+            st.session_state.selected_report_id = st.session_state.unrated[0]
             st.rerun()
         else:
             st.success("You have rated all available reports!")
 
 def draw_rating_page():
-    selected_report_id = st.session_state.selected_report_id
     username = st.session_state.username
+    if ensure_rating_session(username) and st.session_state.selected_report_id not in st.session_state.unrated:
+        # The selected report came from an outdated queue, so move on to the current one
+        if not st.session_state.unrated:
+            st.session_state.page = "progress"
+            del st.session_state.selected_report_id
+            st.rerun()
+            return
+        st.session_state.selected_report_id = st.session_state.unrated[0]
+    selected_report_id = st.session_state.selected_report_id
     report_file = get_report_file_for_user(username)
     report = get_report_by_id(selected_report_id, report_file)
 
@@ -201,17 +507,20 @@ def draw_rating_page():
     comments = st.text_area("Comments:")
 
     if st.button("Submit Rating"):
-        log_action(username, "Submit Rating", report_id=selected_report_id, rating=rating, comments=comments)
+        if not log_action(username, "Submit Rating", report_id=selected_report_id, rating=rating, comments=comments):
+            st.error("Your rating could not be saved. Please submit it again.")
+            return
         st.success("Rating submitted!")
 
-        all_reports = load_all_reports(report_file)
-        rated_reports = get_rated_reports(username)
-        rated_reports.add(selected_report_id)
-
-        reports_to_rate = [r for r in all_reports if r.get('rating_id') not in rated_reports]
+        # Move on using the session queue only, without reading the report file
+        unrated = st.session_state.unrated
+        if unrated and unrated[0] == selected_report_id:
+            unrated.popleft()
+        elif selected_report_id in unrated:
+            unrated.remove(selected_report_id)
         
-        if reports_to_rate:
-            st.session_state.selected_report_id = reports_to_rate[0]['rating_id']
+        if unrated:
+            st.session_state.selected_report_id = unrated[0]
             st.rerun()
         else:
             st.session_state.page = "progress"
@@ -219,34 +528,55 @@ def draw_rating_page():
                 del st.session_state.selected_report_id
             st.rerun()
 
+def read_log_df(log_file):
+    """Reads a JSONL or legacy Excel action log into a DataFrame for display."""
+    import pandas as pd # Only the admin tables need DataFrames
+    if log_file.suffix == ".jsonl":
+        entries = read_log_entries(log_file)
+        # Keep any columns beyond LOG_COLUMNS, such as those of migrated legacy logs
+        return pd.DataFrame(entries) if entries else pd.DataFrame(columns=LOG_COLUMNS)
+    return pd.read_excel(log_file, engine=EXCEL_ENGINE)
+
 def draw_admin_page():
+    import pandas as pd
     st.title("Admin Page")
+    flush_logs() # Show this session's buffered actions too
 
     if st.sidebar.button("⬅️ Back to Progress"):
         st.session_state.page = "progress"
         st.rerun()
 
     st.subheader("Action Logs")
-    log_files = [f for f in LOGS_DIR.iterdir() if f.name.endswith("_action_log.xlsx")]
+    log_files = []
+    if LOGS_DIR.exists():
+        # Legacy Excel logs stay listed next to their JSONL counterparts, so their history remains viewable
+        log_files = sorted(LOGS_DIR.glob("*_action_log.jsonl")) + sorted(LOGS_DIR.glob("*_action_log.xlsx"))
     if not log_files:
         st.warning("No log files found.")
     else:
         log_filenames = [f.name for f in log_files]
         selected_log = st.selectbox("Select a log file to view:", log_filenames)
         if selected_log:
-            log_df = pd.read_excel(LOGS_DIR / selected_log)
-            st.dataframe(log_df)
+            st.dataframe(read_log_df(LOGS_DIR / selected_log))
 
     st.subheader("User List")
-    if USERS_FILE.exists():
-        users_df = pd.read_excel(USERS_FILE)
+    users = load_users()
+    if users is not None:
+        users_df = pd.DataFrame([{'username': username, **record} for username, record in users.items()])
         st.dataframe(users_df)
     else:
         st.warning("Users file not found.")
 
 # --- Main App Router ---
 
-initialize_admin_user()
+@st.cache_resource
+def initialize_app():
+    """Runs the one-time data migrations once per server process instead of on every rerun."""
+    initialize_admin_user()
+    migrate_legacy_logs()
+    return True
+
+initialize_app()
 
 if 'logged_in' not in st.session_state:
     st.session_state.logged_in = False